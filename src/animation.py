@@ -0,0 +1,115 @@
+import os
+import math
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import cairosvg
+import src.robinson as robinson
+from src.constants import VIEWPORT_UL, VIEWPORT_LR
+from src.poster import PNG_SIGNATURE, writeChunk
+
+# Animates the decaying wave of robinson.propagateFromID. The wave schedule (distance of
+# every triangle from the start) is computed once; each frame's gray levels are then a
+# vectorized function of time, and frames are rasterized by a process pool that receives
+# the triangle geometry once per worker.
+
+# same decay and cut-off as propagateFromID
+DECAY = 0.9
+CUTOFF = 0.03
+
+# the front reaches a triangle at time = its distance, which then lights up to its
+# propagateFromID level and fades out over `trail` steps
+def waveLevels(distances: np.ndarray, t: float, trail: float = 8.0) -> np.ndarray:
+    levels = DECAY**distances * np.clip(1.0 - (t - distances) / trail, 0.0, 1.0)
+    levels[(distances > t) | (levels < CUTOFF)] = 0.0
+    return levels
+
+GRAYS = [f"#{g:02x}{g:02x}{g:02x}" for g in range(256)]
+
+# geometry shared by every frame, set once per worker process
+frame_header = None
+frame_paths = None
+
+def initFrameWorker(header: str, paths: [str]):
+    global frame_header, frame_paths
+    frame_header, frame_paths = header, paths
+
+def renderFrame(grays: bytes) -> bytes:
+    body = "".join([f'<path d="{d}" fill="{GRAYS[g]}"/>' for d, g in zip(frame_paths, grays)])
+    return cairosvg.svg2png((frame_header + body + "</svg>").encode())
+
+def writeSequence(directory: str, frames):
+    os.makedirs(directory, exist_ok=True)
+    for i, png in enumerate(frames):
+        with open(os.path.join(directory, f"frame_{i:04d}.png"), "wb") as f:
+            f.write(png)
+
+def readChunks(png: bytes):
+    position = len(PNG_SIGNATURE)
+    while position < len(png):
+        length, = struct.unpack(">I", png[position:position+4])
+        yield png[position+4:position+8], png[position+8:position+8+length]
+        position += 12 + length
+
+def writeAPNG(path: str, frames, frame_count: int, fps: int):
+    sequence = 0
+    with open(path, "wb") as f:
+        f.write(PNG_SIGNATURE)
+        for i, png in enumerate(frames):
+            chunks = list(readChunks(png))
+            ihdr = next(data for type, data in chunks if type == b"IHDR")
+            if i == 0:
+                writeChunk(f, b"IHDR", ihdr)
+                writeChunk(f, b"acTL", struct.pack(">II", frame_count, 0))
+
+            # full-size frame, shown for 1/fps s, replaces the previous one
+            width, height = struct.unpack(">II", ihdr[:8])
+            writeChunk(f, b"fcTL", struct.pack(">IIIIIHHBB", sequence, width, height, 0, 0, 1, fps, 0, 0))
+            sequence += 1
+
+            for type, data in chunks:
+                if type != b"IDAT": continue
+                if i == 0:
+                    writeChunk(f, b"IDAT", data)
+                else:
+                    writeChunk(f, b"fdAT", struct.pack(">I", sequence) + data)
+                    sequence += 1
+        writeChunk(f, b"IEND", b"")
+
+# path ending in .png: animated PNG, anything else: directory of numbered frames
+def saveAnimation(p2: robinson.P2, start_id: str, path: str, steps_per_frame: float = 0.25,
+                  trail: float = 8.0, fps: int = 25, workers: int = None):
+    leaves = list(p2.triangle.iterLeaves())
+    index = {leaf: i for i, leaf in enumerate(leaves)}
+
+    max_distance = math.ceil(math.log(CUTOFF) / math.log(DECAY))
+    start = robinson.getByID(p2.triangle, start_id)
+    if not start:
+        raise ValueError(f"No triangle with id '{start_id}' to start the wave from")
+    schedule = robinson.getWaveSchedule(start, max_distance)
+    distances = np.full(len(leaves), np.inf)
+    for triangle, distance in schedule.items():
+        if triangle in index: distances[index[triangle]] = distance
+
+    duration = max(schedule.values()) + trail
+    times = np.arange(0.0, duration + steps_per_frame, steps_per_frame)
+    grays = [np.round(255*waveLevels(distances, t, trail)).astype(np.uint8).tobytes() for t in times]
+
+    header = (
+        '<svg xmlns="http://www.w3.org/2000/svg" version="1.1" width="1200px" height="900px" '
+        f'viewBox="{VIEWPORT_UL[0]} {VIEWPORT_UL[1]} {VIEWPORT_LR[0]-VIEWPORT_UL[0]} {VIEWPORT_LR[1]-VIEWPORT_UL[1]}">'
+    )
+    paths = [f"M {t.a[0]} {t.a[1]} L {t.b[0]} {t.b[1]} {t.c[0]} {t.c[1]} z" for t in leaves]
+
+    with ProcessPoolExecutor(workers, initializer=initFrameWorker, initargs=(header, paths)) as pool:
+        frames = pool.map(renderFrame, grays, chunksize=4)
+        if path.endswith(".png"): writeAPNG(path, frames, len(grays), fps)
+        else: writeSequence(path, frames)
+
+if __name__=="__main__":
+
+    p2 = robinson.P2(9)
+    start_id = robinson.searchSmallestAtPoint(p2.triangle, np.array([0.1, 0.5]))
+
+    saveAnimation(p2, start_id, "output_wave.png")
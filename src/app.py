@@ -2,10 +2,19 @@ from tkinter import *
 from tkinter import ttk
 import tkinter.colorchooser as cc
 import tkinter.filedialog as fd
+import tkinter.simpledialog as sd
+import tkinter.messagebox as mb
+import threading
 
-import src.dartsandkites_svg
+# numpy, the geometry modules and cairosvg are imported lazily, see preloadRenderer
+from src.render_scheduler import RenderScheduler
 import xml.etree.ElementTree as ET
-import cairosvg
+
+def preloadRenderer():
+    import src.dartsandkites_svg
+    import cairosvg
+    # the first conversion pays for cairo's one-time setup
+    cairosvg.svg2png(b'<svg xmlns="http://www.w3.org/2000/svg" width="1px" height="1px"/>')
 
 class App(Tk):
     
@@ -28,6 +37,9 @@ class App(Tk):
         }
         self.dnk = None
         self.img = None
+        self.bytes = None
+        self.imbytes = None
+        self.renderer = RenderScheduler(self, self.showImage)
 
         for F in (StartPage, Editor):
             frame = F(container, self)
@@ -36,22 +48,30 @@ class App(Tk):
 
         self.showFrame(StartPage)
 
+        # show the window first, then load the rendering stack while the user picks settings
+        self.after(0, lambda: threading.Thread(target=preloadRenderer, daemon=True).start())
+
     def showFrame(self, container):
 
         frame = self.frames[container]
         frame.tkraise()
 
     def createImage(self, rec_depth: int):
+        import src.dartsandkites_svg
 
         self.dnk = src.dartsandkites_svg.DnkInterface(rec_depth, **{attr: val.get() for (attr, val) in self.style.items()})
-        self.bytes = self.dnk.getSVGbytes()
-        self.imbytes = cairosvg.svg2png(self.bytes)
+        self.renderer.request(self.dnk)
+
+        self.showFrame(Editor)
+
+    def showImage(self, svg, png):
+
+        self.bytes = svg
+        self.imbytes = png
 
         self.img = PhotoImage(data=self.imbytes)
         self.frames[Editor].canvas.itemconfig(self.frames[Editor].canvas_img, image=self.img)
 
-        self.showFrame(Editor)        
-
 class StartPage(ttk.Frame):
 
 
@@ -136,17 +156,22 @@ class Editor(ttk.Frame):
         Button(self.buttons, text="Return", command=lambda: controller.showFrame(StartPage)).grid(column=0, row=0)
         Button(self.buttons, text="Save PNG", command=self.saveAsPNG).grid(column=1, row=0)
         Button(self.buttons, text="Save SVG", command=self.saveAsSVG).grid(column=2, row=0)
+        Button(self.buttons, text="Save mesh", command=self.saveAsMesh).grid(column=3, row=0)
+        Button(self.buttons, text="Save poster", command=self.saveAsPoster).grid(column=4, row=0)
 
     def setThickness(self):
-        self.controller.dnk.updateBorder(width=self.size_var.get()*0.0005)
+        with self.controller.renderer.lock:
+            self.controller.dnk.updateBorder(width=self.size_var.get()*0.0005)
         self.updateImage()
 
     def setBorderColor(self):
-        self.controller.dnk.updateBorder(color=self.controller.style["border_color"].get())
+        with self.controller.renderer.lock:
+            self.controller.dnk.updateBorder(color=self.controller.style["border_color"].get())
         self.updateImage()
 
     def paintImage(self, event):
-        paint = self.controller.dnk.paint(event.x/1200.0, event.y/900.0, self.color_var.get())
+        with self.controller.renderer.lock:
+            paint = self.controller.dnk.paint(event.x/1200.0, event.y/900.0, self.color_var.get())
         if paint: self.updateImage()
 
     def pickColor(self, event):
@@ -154,24 +179,55 @@ class Editor(ttk.Frame):
         self.picker.setColor(color)
 
     def updateImage(self):
-        self.controller.bytes = self.controller.dnk.getSVGbytes()
-        self.controller.imbytes = cairosvg.svg2png(self.controller.bytes)
-        self.controller.img = PhotoImage(data=self.controller.imbytes)
-        self.canvas.itemconfig(self.canvas_img, image=self.controller.img)
+        self.controller.renderer.request(self.controller.dnk)
 
     def paintCanvas(self):
         ...
 
+    # the image on screen may lag behind the tiling, so saves render the current state
+    def getCurrentSVG(self) -> bytes:
+        with self.controller.renderer.lock:
+            return self.controller.dnk.getSVGbytes()
+
     def saveAsPNG(self):
+        import cairosvg
         f = fd.asksaveasfile(mode='wb', defaultextension=".png")
-        f.write(self.controller.imbytes)
+        if not f: return
+        f.write(cairosvg.svg2png(self.getCurrentSVG()))
         f.close()
 
     def saveAsSVG(self):
         f = fd.asksaveasfile(mode='wb', defaultextension=".svg")
-        f.write(self.controller.bytes)
+        if not f: return
+        f.write(self.getCurrentSVG())
         f.close()
 
+    def saveAsMesh(self):
+        path = fd.asksaveasfilename(defaultextension=".ply", filetypes=[("PLY mesh", "*.ply"), ("NumPy arrays", "*.npz")])
+        if not path: return
+        import src.mesh_export
+        with self.controller.renderer.lock:
+            src.mesh_export.writeMesh(path, self.controller.dnk)
+
+    def saveAsPoster(self):
+        width = sd.askinteger("Save poster", "Width in pixels (height follows the 4:3 view):", initialvalue=20000, minvalue=1)
+        if not width: return
+        path = fd.asksaveasfilename(defaultextension=".png")
+        if not path: return
+        import src.poster
+        with self.controller.renderer.lock:
+            snapshot = self.controller.dnk.getSnapshot()
+
+        # posters take minutes, render them off the Tk thread
+        def export():
+            try:
+                src.poster.savePoster(snapshot, path, width, round(width*0.75))
+            except Exception as e:
+                self.after(0, lambda: mb.showerror("Save poster", f"Saving {path} failed: {e}"))
+                return
+            self.after(0, lambda: mb.showinfo("Save poster", f"Saved {path}"))
+        threading.Thread(target=export, daemon=True).start()
+
 class ColorSquare(Canvas):
     
     def __init__(self, parent, color):
@@ -1,7 +1,7 @@
 import src.robinson as robinson
 import numpy as np
 import xml.etree.ElementTree as ET
-from src.utils_geometry import ccw, pointInTriangle
+from src.utils_geometry import ccw, pointInTriangle, pointInQuads
 from src.constants import VIEWPORT_UL, VIEWPORT_LR
 
 
@@ -10,9 +10,15 @@ def tileFactory(type: str, triangle1: robinson.Robinson, triangle2: robinson.Rob
     
     
     if type == "halfkite":
-        return Kite(triangle1.a, triangle1.b, triangle1.c, triangle2.b)
+        tile = Kite(triangle1.a, triangle1.b, triangle1.c, triangle2.b)
+        if triangle1.exact:
+            tile.exact = (triangle1.exact[0], triangle1.exact[1], triangle1.exact[2], triangle2.exact[1])
+        return tile
     if type == "halfdart":
-        return Dart(triangle1.a, triangle1.b, triangle2.a, triangle1.c)
+        tile = Dart(triangle1.a, triangle1.b, triangle2.a, triangle1.c)
+        if triangle1.exact:
+            tile.exact = (triangle1.exact[0], triangle1.exact[1], triangle2.exact[0], triangle1.exact[2])
+        return tile
     
     return None
 
@@ -22,6 +28,9 @@ class Tile:
 
     def __init__(self, a: [np.float_], b: [np.float_], c: [np.float_], d: [np.float_]):
         self.a, self.b, self.c, self.d = a, b, c, d
+        # exact corners and their indices into DartsAndKites.vertices, if tracked
+        self.exact = None
+        self.indices = None
         self.references = []
         self.cls = ""
         self.fill = "black"
@@ -69,23 +78,75 @@ class DartsAndKites:
         self.tiles = []
         self.references = {}
         self.p2 = p2
+        self.corners = None
 
-        for triangle in p2.triangle.getAllLeaves():
+        # shared vertices of an exact tiling: ExactPoint -> index into getVertexArray()
+        self.vertices = {}
+
+        if not p2: return
+
+        for triangle in p2.triangle.iterLeaves():
             # avoid duplication: only process a tile when finding the ccw half
-            if triangle.getMirror() and not ccw(triangle.a, triangle.b, triangle.c): continue 
+            if triangle.getMirror() and not self.isCCW(triangle): continue 
 
 
             opposite = triangle.getMirror()
             if not opposite:
-                opposite = robinson.Robinson(triangle.b, triangle.c, triangle.a)
+                opposite = robinson.Robinson(triangle.b, triangle.c, triangle.a,
+                    triangle.exact and (triangle.exact[1], triangle.exact[2], triangle.exact[0]))
                 opposite.id = -1
             new_tile = tileFactory(triangle.cls, triangle, opposite)
             new_tile.references = [triangle.id, opposite.id]
             self.references[triangle.id] = new_tile
             if opposite.id != -1: self.references[str(opposite.id)] = new_tile
 
+            if new_tile.exact:
+                new_tile.indices = [self.vertices.setdefault(vertex, len(self.vertices)) for vertex in new_tile.exact]
+
             self.tiles.append(new_tile)
 
+    # tiling without a triangle tree behind it, e.g. loaded from a warm-start bundle;
+    # corners (N, 4, 2), classes (N,) of "kite" / "dart"
+    @staticmethod
+    def fromArrays(corners: np.ndarray, classes: np.ndarray) -> 'DartsAndKites':
+        dnk = DartsAndKites(None)
+        dnk.corners = corners
+        dnk.tiles = [(Kite if cls == "kite" else Dart)(*tile) for tile, cls in zip(corners, classes)]
+        return dnk
+
+    def isCCW(self, triangle: robinson.Robinson) -> bool:
+        if triangle.exact: return self.p2.frame.ccw(*triangle.exact)
+        return ccw(triangle.a, triangle.b, triangle.c)
+
+    # float coordinates of the shared vertices of an exact tiling, converted in one go
+    def getVertexArray(self) -> np.ndarray:
+        return self.p2.frame.toFloat(list(self.vertices))
+
+    # shared-vertex mesh: (vertices (V, 2), faces (F, 4) indexing vertices, classes (F,));
+    # faces of boundary half-tiles without a mirror are triangles, padded with -1
+    def getIndexedMesh(self, tolerance: float = 1e-9) -> (np.ndarray, np.ndarray, np.ndarray):
+        classes = np.array([tile.cls for tile in self.tiles])
+
+        if self.vertices:
+            vertices = self.getVertexArray()
+            faces = np.array([tile.indices for tile in self.tiles], dtype=np.int32).reshape(-1, 4)
+        else:
+            # float tiling: corners reached along different subdivision paths only agree up to
+            # rounding, so identify them on a grid of the given tolerance
+            corners = np.array([[tile.a, tile.b, tile.c, tile.d] for tile in self.tiles]).reshape(-1, 2)
+            keys = np.round(corners / tolerance).astype(np.int64)
+            _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+            vertices = corners[first]
+            faces = inverse.reshape(-1, 4).astype(np.int32)
+
+        # a missing mirror half is stood in for by a repeated corner, drop the zero-length edge
+        repeated = faces == np.roll(faces, -1, axis=1)
+        for row in np.flatnonzero(repeated.any(axis=1)):
+            kept = faces[row][~repeated[row]]
+            faces[row] = np.concatenate([kept, np.full(4 - len(kept), -1)])
+
+        return vertices, faces, classes
+
     def getSVG(self) -> ET.Element:
         root = ET.Element('svg')
         root.set("version", "1.1")
@@ -99,11 +160,15 @@ class DartsAndKites:
         style.text = "path { stroke: black; stroke-width: 0.001 }"
         root.append(style)
 
-        root.extend([tile.getPath() for tile in self.tiles])
+        root.extend(tile.getPath() for tile in self.tiles)
 
         return root
     
     def getTileIDAtXY(self, x) -> int:
+        if not self.p2:
+            hits = np.flatnonzero(pointInQuads(self.corners, x))
+            return self.tiles[hits[0]].id if len(hits) else -1
+
         id = robinson.searchSmallestAtPoint(self.p2.triangle, x)
         if id == -1: return -1
         return self.references[id].id
@@ -1,20 +1,15 @@
-import src.dartsandkites as dartsandkites
-import src.robinson as robinson
+import src.warmstart as warmstart
 import xml.etree.ElementTree as ET
+import copy
 from src.constants import VIEWPORT_UL, VIEWPORT_LR
 from numpy import array
+import numpy as np
 
 class DnkInterface():
 
     def __init__(self, rec_depth, border_thickness=0.001, border_color="#000000", dart_color="#ffaa00", kite_color="#0000aa"):
         
-        self.svg = ET.Element('svg')
-        self.svg.set("version", "1.1")
-        self.svg.set("width", "1200px")
-        self.svg.set("height", "900px")
-        self.svg.set("version", "1.1")
-        self.svg.set("viewBox", f"{VIEWPORT_UL[0]} {VIEWPORT_UL[1]} {VIEWPORT_LR[0]-VIEWPORT_UL[0]} {VIEWPORT_LR[1]-VIEWPORT_UL[1]}")
-        self.svg.set("xmlns", "http://www.w3.org/2000/svg")
+        self.svg = self.getRootElement(VIEWPORT_UL, VIEWPORT_LR, 1200, 900)
 
         self.styles = {
             "path": {
@@ -36,15 +31,60 @@ class DnkInterface():
 
         self.paths = {}
         self.colors = {}
+        self.bounds = None
 
         self.style = self.getStyleElement()
 
-        self.dnk = dartsandkites.DartsAndKites(robinson.P2(rec_depth))
+        self.dnk = warmstart.loadTiling(rec_depth)
         for tile in self.dnk.tiles:
             self.paths[tile.id] = tile.getPath()
             if tile.cls == "dart": self.colors[tile.id] = dart_color
             if tile.cls == "kite": self.colors[tile.id] = kite_color
 
+    def getRootElement(self, ul, lr, width, height) -> ET.Element:
+        root = ET.Element('svg')
+        root.set("version", "1.1")
+        root.set("width", f"{width}px")
+        root.set("height", f"{height}px")
+        root.set("viewBox", f"{ul[0]} {ul[1]} {lr[0]-ul[0]} {lr[1]-ul[1]}")
+        root.set("xmlns", "http://www.w3.org/2000/svg")
+        return root
+
+    # copy of the editable state that long exports can read while the editor carries on
+    def getSnapshot(self) -> 'DnkInterface':
+        self.getTileBounds()
+        snapshot = copy.copy(self)
+        snapshot.paths = {id: ET.Element(path.tag, dict(path.attrib)) for id, path in self.paths.items()}
+        snapshot.colors = dict(self.colors)
+        snapshot.styles = {selector: dict(style) for selector, style in self.styles.items()}
+        snapshot.style = snapshot.getStyleElement()
+        return snapshot
+
+    # bounding boxes (min x, min y, max x, max y) of the tiles, in self.paths order
+    def getTileBounds(self) -> np.ndarray:
+        if self.bounds is None:
+            corners = np.array([[tile.a, tile.b, tile.c, tile.d] for tile in self.dnk.tiles]).reshape(-1, 4, 2)
+            self.bounds = np.concatenate([corners.min(axis=1), corners.max(axis=1)], axis=1)
+        return self.bounds
+
+    # SVG of the rectangle UL-LR of the tiling stretched to width x height pixels,
+    # only containing the tiles that reach into it
+    def getRegionSVGbytes(self, ul, lr, width, height):
+        root = self.getRootElement(ul, lr, width, height)
+        root.set("preserveAspectRatio", "none")
+        root.append(self.style)
+
+        bounds = self.getTileBounds()
+        margin = float(self.styles["path"]["stroke-width"])
+        inside = (
+            (bounds[:, 2] >= ul[0] - margin) & (bounds[:, 0] <= lr[0] + margin) &
+            (bounds[:, 3] >= ul[1] - margin) & (bounds[:, 1] <= lr[1] + margin)
+        )
+        paths = list(self.paths.values())
+        root.extend(paths[i] for i in np.flatnonzero(inside))
+
+        return ET.tostring(root)
+
     def updateBorder(self, width=-1, color=""):
 
         if width == -1: width = float(self.styles["path"]["stroke-width"])
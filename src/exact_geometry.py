@@ -0,0 +1,114 @@
+import numpy as np
+from src.constants import psi
+
+# exact arithmetic in Z[psi], psi being the golden ratio (psi^2 = psi + 1)
+class ZPhi:
+
+    __slots__ = ("p", "q")
+
+    # p + q*psi
+    def __init__(self, p: int = 0, q: int = 0):
+        self.p, self.q = p, q
+
+    def __add__(self, other: 'ZPhi') -> 'ZPhi':
+        return ZPhi(self.p + other.p, self.q + other.q)
+
+    def __sub__(self, other: 'ZPhi') -> 'ZPhi':
+        return ZPhi(self.p - other.p, self.q - other.q)
+
+    def __neg__(self) -> 'ZPhi':
+        return ZPhi(-self.p, -self.q)
+
+    def __mul__(self, other: 'ZPhi') -> 'ZPhi':
+        return ZPhi(
+            self.p*other.p + self.q*other.q,
+            self.p*other.q + self.q*other.p + self.q*other.q
+        )
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ZPhi) and self.p == other.p and self.q == other.q
+
+    def __hash__(self) -> int:
+        return hash((self.p, self.q))
+
+    def __float__(self) -> float:
+        return self.p + self.q*psi
+
+    def __repr__(self) -> str:
+        return f"ZPhi({self.p}, {self.q})"
+
+    def sign(self) -> int:
+        # p + q*psi = (2p + q + q*sqrt(5)) / 2, compare x against -q*sqrt(5) in integers
+        x, y = 2*self.p + self.q, self.q
+        if x >= 0 and y >= 0: return int(x > 0 or y > 0)
+        if x <= 0 and y <= 0: return -1
+        if x > 0: return 1 if x*x > 5*y*y else -1
+        return 1 if 5*y*y > x*x else -1
+
+ZPHI_ZERO = ZPhi(0, 0)
+ZPHI_ONE = ZPhi(1, 0)
+ZPHI_PSI_INV = ZPhi(-1, 1)
+
+# point of the plane given exactly in the affine frame of a reference triangle ABC:
+# P = A + u*(B - A) + v*(C - A), with u, v in Z[psi]
+class ExactPoint:
+
+    __slots__ = ("u", "v")
+
+    def __init__(self, u: ZPhi, v: ZPhi):
+        self.u, self.v = u, v
+
+    def __add__(self, other: 'ExactPoint') -> 'ExactPoint':
+        return ExactPoint(self.u + other.u, self.v + other.v)
+
+    def __sub__(self, other: 'ExactPoint') -> 'ExactPoint':
+        return ExactPoint(self.u - other.u, self.v - other.v)
+
+    def __mul__(self, scalar: ZPhi) -> 'ExactPoint':
+        return ExactPoint(self.u * scalar, self.v * scalar)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ExactPoint) and self.u == other.u and self.v == other.v
+
+    def __hash__(self) -> int:
+        return hash((self.u.p, self.u.q, self.v.p, self.v.q))
+
+    def __repr__(self) -> str:
+        return f"ExactPoint({self.u}, {self.v})"
+
+    def coefficients(self) -> (int, int, int, int):
+        return (self.u.p, self.u.q, self.v.p, self.v.q)
+
+class ExactFrame:
+
+    def __init__(self, a: [np.float_], b: [np.float_], c: [np.float_]):
+        self.origin = np.asarray(a, dtype=np.float_)
+        self.axes = np.array([b - a, c - a], dtype=np.float_)
+        # orientation of the frame; uv-space turns are flipped by a mirroring frame
+        self.orientation = 1 if np.cross(self.axes[0], self.axes[1]) > 0 else -1
+
+    def corners(self) -> (ExactPoint, ExactPoint, ExactPoint):
+        return (
+            ExactPoint(ZPHI_ZERO, ZPHI_ZERO),
+            ExactPoint(ZPHI_ONE, ZPHI_ZERO),
+            ExactPoint(ZPHI_ZERO, ZPHI_ONE)
+        )
+
+    # exact counterpart of utils_geometry.ccw
+    def ccw(self, A: ExactPoint, B: ExactPoint, C: ExactPoint) -> bool:
+        cross = (C.v - A.v) * (B.u - A.u) - (B.v - A.v) * (C.u - A.u)
+        return cross.sign() * self.orientation > 0
+
+    # convert many points at once, only needed when handing geometry to a renderer
+    def toFloat(self, points: [ExactPoint]) -> np.ndarray:
+        coefficients = np.array([point.coefficients() for point in points], dtype=np.float_).reshape(-1, 4)
+        uv = coefficients[:, 0::2] + psi*coefficients[:, 1::2]
+        return self.origin + uv @ self.axes
+
+if __name__=="__main__":
+    frame = ExactFrame(np.array([0.0, 0.0]), np.array([0.0, 1.0]), np.array([1.0, 0.5]))
+    a, b, c = frame.corners()
+    d = c + (a - c) * ZPHI_PSI_INV
+
+    print(frame.toFloat([a, b, c, d]))
+    print(frame.ccw(a, b, c), frame.ccw(a, c, b))
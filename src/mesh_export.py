@@ -0,0 +1,89 @@
+import numpy as np
+
+# face "type" attribute values
+TILE_TYPES = {"kite": 0, "dart": 1}
+
+def parseColor(color: str) -> (int, int, int):
+    if not color.startswith("#") or len(color) not in [4, 7]:
+        raise ValueError(f"Unsupported color '{color}', expected #rgb or #rrggbb")
+    if len(color) == 4:
+        color = "#" + "".join(2*ch for ch in color[1:])
+    return tuple(int(color[i:i+2], 16) for i in [1, 3, 5])
+
+def getMeshArrays(dnki) -> {str: np.ndarray}:
+    vertices, faces, classes = dnki.dnk.getIndexedMesh()
+    types = np.array([TILE_TYPES[cls] for cls in classes], dtype=np.uint8)
+
+    # tiles sharing a color are common, parse each distinct color only once
+    palette = {color: parseColor(color) for color in set(dnki.colors.values())}
+    colors = np.array([palette[dnki.colors[tile.id]] for tile in dnki.dnk.tiles], dtype=np.uint8).reshape(-1, 3)
+
+    return {
+        "vertices": vertices.astype(np.float32),
+        "faces": faces,
+        "types": types,
+        "colors": colors
+    }
+
+def writeNPZ(path: str, dnki):
+    np.savez(path, **getMeshArrays(dnki))
+
+def writePLY(path: str, dnki):
+    arrays = getMeshArrays(dnki)
+    vertices, faces = arrays["vertices"], arrays["faces"]
+
+    # flat tiling, z is written for the benefit of extrusion tools
+    vertex_data = np.zeros(len(vertices), dtype=[("x", "<f4"), ("y", "<f4"), ("z", "<f4")])
+    vertex_data["x"] = vertices[:, 0]
+    vertex_data["y"] = vertices[:, 1]
+
+    # PLY face lists may differ in length per face: write all quads, then the boundary
+    # triangles, each group in one bulk write
+    sizes = (faces >= 0).sum(axis=1)
+    face_groups = []
+    for size in [4, 3]:
+        rows = np.flatnonzero(sizes == size)
+        group = np.empty(len(rows), dtype=[
+            ("count", "u1"), ("indices", "<i4", (size,)), ("type", "u1"),
+            ("red", "u1"), ("green", "u1"), ("blue", "u1")
+        ])
+        group["count"] = size
+        group["indices"] = faces[rows, :size]
+        group["type"] = arrays["types"][rows]
+        group["red"] = arrays["colors"][rows, 0]
+        group["green"] = arrays["colors"][rows, 1]
+        group["blue"] = arrays["colors"][rows, 2]
+        face_groups.append(group)
+
+    header = "\n".join([
+        "ply",
+        "format binary_little_endian 1.0",
+        f"element vertex {len(vertex_data)}",
+        "property float x",
+        "property float y",
+        "property float z",
+        f"element face {sum(len(group) for group in face_groups)}",
+        "property list uchar int vertex_indices",
+        "property uchar type",
+        "property uchar red",
+        "property uchar green",
+        "property uchar blue",
+        "end_header"
+    ]) + "\n"
+
+    with open(path, "wb") as f:
+        f.write(header.encode("ascii"))
+        vertex_data.tofile(f)
+        for group in face_groups:
+            group.tofile(f)
+
+def writeMesh(path: str, dnki):
+    if path.endswith(".npz"): writeNPZ(path, dnki)
+    else: writePLY(path, dnki)
+
+if __name__=="__main__":
+    import src.dartsandkites_svg as dartsandkites_svg
+
+    dnki = dartsandkites_svg.DnkInterface(11)
+    writePLY("output_dnk.ply", dnki)
+    writeNPZ("output_dnk.npz", dnki)
@@ -0,0 +1,108 @@
+import os
+import sys
+import zlib
+import struct
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import numpy as np
+import cairosvg
+from src.constants import VIEWPORT_UL, VIEWPORT_LR
+
+# Renders the tiling to an arbitrarily large PNG. The image is cut into horizontal strips
+# that worker processes rasterize independently, each from an SVG holding only the tiles
+# that reach into it; finished strips are fed in order into a single streaming PNG encoder,
+# so only the strips currently in flight are ever held in memory.
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+def writeChunk(f, type: bytes, data: bytes):
+    f.write(struct.pack(">I", len(data)))
+    f.write(type)
+    f.write(data)
+    f.write(struct.pack(">I", zlib.crc32(type + data)))
+
+# cairo refuses image surfaces above 32767 px a side, wider strips are rendered in columns
+MAX_TILE_WIDTH = 8192
+
+# worker: SVG bytes -> straight (not premultiplied) RGBA rows of one piece of a strip
+def renderStrip(svg: bytes) -> bytes:
+    surface = cairosvg.surface.PNGSurface(cairosvg.parser.Tree(bytestring=svg), None, 96)
+    image = surface.cairo
+    image.flush()
+    width, height = surface.width, surface.height
+
+    pixels = np.frombuffer(image.get_data(), dtype=np.uint8).reshape(height, image.get_stride())
+    pixels = pixels[:, :4*width].reshape(height, width, 4)
+    # cairo stores native-endian premultiplied ARGB words
+    if sys.byteorder == "big": pixels = pixels[..., ::-1]
+
+    rgba = np.empty((height, width, 4), dtype=np.uint8)
+
+    # un-premultiply a few rows at a time so temporaries stay small next to the strip;
+    # 255*255 + 127 still fits in uint16
+    for top in range(0, height, 16):
+        block = pixels[top:top+16]
+        alpha = block[..., 3:4].astype(np.uint16)
+        rgb = block[..., 2::-1].astype(np.uint16)
+        rgb *= 255
+        rgb += alpha // 2
+        rgb //= np.maximum(alpha, 1)
+        rgba[top:top+16, :, :3] = rgb
+        rgba[top:top+16, :, 3:] = alpha
+
+    return rgba.tobytes()
+
+def savePoster(dnki, path: str, width: int, height: int, strip_height: int = 256, workers: int = None):
+    if width < 1 or height < 1:
+        raise ValueError(f"Poster size must be positive, got {width}x{height}")
+
+    workers = workers or os.cpu_count()
+    pixel = (VIEWPORT_LR - VIEWPORT_UL) / np.array([width, height])
+    columns = [(left, min(MAX_TILE_WIDTH, width - left)) for left in range(0, width, MAX_TILE_WIDTH)]
+
+    # spawn, not fork: the caller may be a GUI with a render thread inside cairo right now
+    context = multiprocessing.get_context("spawn")
+
+    with open(path, "wb") as f, ProcessPoolExecutor(workers, mp_context=context) as pool:
+        f.write(PNG_SIGNATURE)
+        # 8-bit RGBA, no interlacing
+        writeChunk(f, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+
+        compressor = zlib.compressobj()
+        # stitch the columns of one strip into PNG scanlines (filter byte + RGBA row)
+        def encode(rows: int, pieces):
+            scanlines = np.zeros((rows, 1 + 4*width), dtype=np.uint8)
+            for (left, piece_width), piece in zip(columns, pieces):
+                scanlines[:, 1 + 4*left : 1 + 4*(left + piece_width)] = \
+                    np.frombuffer(piece.result(), dtype=np.uint8).reshape(rows, 4*piece_width)
+            data = compressor.compress(scanlines.tobytes())
+            if data: writeChunk(f, b"IDAT", data)
+
+        # keep just enough pieces in flight to occupy every worker
+        pending = deque()
+        in_flight = 0
+        for top in range(0, height, strip_height):
+            rows = min(strip_height, height - top)
+            pieces = []
+            for left, piece_width in columns:
+                ul = VIEWPORT_UL + np.array([left, top]) * pixel
+                lr = VIEWPORT_UL + np.array([left + piece_width, top + rows]) * pixel
+                pieces.append(pool.submit(renderStrip, dnki.getRegionSVGbytes(ul, lr, piece_width, rows)))
+            pending.append((rows, pieces))
+            in_flight += len(pieces)
+            while in_flight - len(pending[0][1]) >= workers:
+                in_flight -= len(pending[0][1])
+                encode(*pending.popleft())
+        while pending:
+            encode(*pending.popleft())
+
+        writeChunk(f, b"IDAT", compressor.flush())
+        writeChunk(f, b"IEND", b"")
+
+if __name__=="__main__":
+    import src.dartsandkites_svg as dartsandkites_svg
+
+    dnki = dartsandkites_svg.DnkInterface(11)
+    savePoster(dnki, "output_dnk_poster.png", 20000, 15000)
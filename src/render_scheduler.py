@@ -0,0 +1,63 @@
+import threading
+import traceback
+
+# Renders a DnkInterface on a background worker and hands the newest image back to Tk.
+#
+# Requests made while a frame is rendering are coalesced into one: the worker only ever
+# renders the latest requested state, intermediate states are dropped, and at most one
+# render is in flight. Finished frames are posted to the Tk thread through `after`.
+class RenderScheduler:
+
+    def __init__(self, widget, callback):
+        self.widget = widget
+        self.callback = callback
+
+        # guards the DnkInterface: hold it on the Tk thread while mutating the tiling
+        self.lock = threading.Lock()
+
+        self.condition = threading.Condition()
+        self.dnk = None
+        self.requested = 0
+        self.started = 0
+        self.shown = 0
+        self.worker = None
+
+    def request(self, dnk):
+        with self.condition:
+            self.dnk = dnk
+            self.requested += 1
+            if not self.worker:
+                self.worker = threading.Thread(target=self._work, daemon=True)
+                self.worker.start()
+            self.condition.notify()
+
+    def _work(self):
+        # imported here to keep it off the startup path
+        import cairosvg
+
+        while True:
+            with self.condition:
+                while self.started == self.requested:
+                    self.condition.wait()
+                generation = self.started = self.requested
+                dnk = self.dnk
+
+            # a failed frame must not take the worker down with it, the next request
+            # gets a fresh attempt
+            try:
+                with self.lock:
+                    svg = dnk.getSVGbytes()
+                png = cairosvg.svg2png(svg)
+            except Exception:
+                traceback.print_exc()
+                continue
+
+            # always post: under a steady stream of requests the screen still advances
+            # once per render instead of waiting for the input to stop
+            self.widget.after(0, self._post, generation, svg, png)
+
+    def _post(self, generation, svg, png):
+        # drop frames older than the one already on screen
+        if generation <= self.shown: return
+        self.shown = generation
+        self.callback(svg, png)
@@ -1,10 +1,12 @@
 from src.constants import psi, psi_inv, halfkite_height, VIEWPORT_LR, VIEWPORT_UL
 import src.constants as cts
-from src.utils_geometry import triangleRectanglePosition, pointInTriangle
+from src.utils_geometry import triangleRectanglePosition, pointInTriangle, triangleBoxOverlap
+from src.exact_geometry import ExactFrame, ZPHI_PSI_INV
 
 import numpy as np
 
 import xml.etree.ElementTree as ET
+from collections import deque
 
 
 
@@ -42,12 +44,12 @@ def getSuperneighborhood(type1: str, edge: int, type2: str) -> [(int, int, int)]
         
     raise ValueError(f"Unhandled combination of arguments ({type1}, {type2}, {edge})")
 
-def robinsonFactory(type: str, a: [np.float_], b: [np.float_], c: [np.float_]) -> 'Robinson':
+def robinsonFactory(type: str, a: [np.float_], b: [np.float_], c: [np.float_], exact=None) -> 'Robinson':
     
-    if type == "halfkite": return HalfKite(a, b, c)
-    if type == "halfdart": return HalfDart(a, b, c)
+    if type == "halfkite": return HalfKite(a, b, c, exact)
+    if type == "halfdart": return HalfDart(a, b, c, exact)
     
-    return Robinson(a, b, c)
+    return Robinson(a, b, c, exact)
 
 def reflectedCoords(type: str, a: [np.float_], b: [np.float_], c: [np.float_]) -> [[np.float_]]:
 
@@ -65,8 +67,10 @@ class Robinson:
     next_id = 0
     
 
-    def __init__(self, a: [np.float_], b: [np.float_], c: [np.float_]):
+    def __init__(self, a: [np.float_], b: [np.float_], c: [np.float_], exact=None):
         self.a, self.b, self.c = a, b, c
+        # optional exact (ExactPoint) counterparts of a, b, c
+        self.exact = exact
         self.neighbors = [None,None,None,None]
         self.leaf = True
         self.parent = None
@@ -76,7 +80,6 @@ class Robinson:
         self.cls = ""
         self.level = 0
         self.skip_window = False
-        self.children_blueprint = []
 
     def inflate(self, window=None):
         if self.leaf:
@@ -88,11 +91,13 @@ class Robinson:
     
     def _inflate(self, window=None):
         self.leaf = False
-        coords = [x[0] for x in self.children_blueprint]
-        types  = [x[1] for x in self.children_blueprint]
-        nbs    = [x[2] for x in self.children_blueprint]
+        children_blueprint = self.getChildrenBlueprint()
+        coords = [x[0] for x in children_blueprint]
+        types  = [x[1] for x in children_blueprint]
+        nbs    = [x[2] for x in children_blueprint]
+        exacts = [x[3] for x in children_blueprint]
         
-        for i, (type, (a, b, c)) in enumerate(zip(types, coords)):
+        for i, (type, (a, b, c), exact) in enumerate(zip(types, coords, exacts)):
             
             # test if coords are wholly within rectangle
             if window and not self.skip_window:
@@ -109,7 +114,7 @@ class Robinson:
                         continue
 
             # add triangle
-            self.children[i] = robinsonFactory(type, a, b, c)
+            self.children[i] = robinsonFactory(type, a, b, c, exact)
             self.children[i].parent = self
             self.children[i].index = i + 1
             self.children[i].id = f"{self.id}-{i+1}"
@@ -123,12 +128,15 @@ class Robinson:
                 child.neighbors[edge] = self.children[neighbor]
 
     def findNeighbors(self):
-        
-        if not self.leaf:
-            for child in self.children:
-                if not child: continue
-                child.findNeighbors()
-            return
+        for leaf in self.iterLeaves():
+            leaf._findNeighbors()
+
+    # link every node of a subtree built in one go, parents before their children
+    def linkNeighbors(self):
+        for node in self.iterNodes():
+            node._findNeighbors()
+
+    def _findNeighbors(self):
         
         if not self.parent: return
 
@@ -144,13 +152,28 @@ class Robinson:
                 if my_index != self.index: continue
                 self.neighbors[edge_type-1] = super_neighbor.children[my_neighbor_index-1]
     
+    # preorder walk of the subtree without recursion
+    #  - level: only yield nodes this many levels below self (and don't descend further)
+    #  - window: (ul, lr) rectangle, subtrees whose bounding box misses it are skipped
+    def iterNodes(self, level: int = None, window=None):
+        stack = [(self, 0)]
+        while stack:
+            node, depth = stack.pop()
+            if window and not triangleBoxOverlap(node.a, node.b, node.c, window[0], window[1]): continue
+            if level is None or depth == level: yield node
+            if depth == level: continue
+            stack.extend((child, depth + 1) for child in reversed(node.children) if child)
+
+    def iterLeaves(self, window=None):
+        for node in self.iterNodes(window=window):
+            if node.leaf: yield node
+
     def getAllLeaves(self) -> ['Robinson']:
-        if self.leaf: return [self]
-        leaves = []
-        for child in self.children:
-            if not child: continue
-            leaves.extend(child.getAllLeaves())
-        return leaves
+        return list(self.iterLeaves())
+
+    # children as ((a, b, c), type, sibling links, exact (a, b, c)), computed on demand
+    def getChildrenBlueprint(self):
+        return []
 
     def getMirror(self) -> 'Robinson':
         raise TypeError("Base Robinson class triangles don't have mirrors")
@@ -159,18 +182,25 @@ class HalfDart(Robinson):
     # A > B >>>> C >> A
     # AB : BC : CA = 1 : 1 : psi
 
-    def __init__(self, a: [np.float_], b: [np.float_], c: [np.float_]):
-        super().__init__(a, b, c)
+    def __init__(self, a: [np.float_], b: [np.float_], c: [np.float_], exact=None):
+        super().__init__(a, b, c, exact)
         self.cls = "halfdart"
+
+    def getChildrenBlueprint(self):
+        a, b, c, exact = self.a, self.b, self.c, self.exact
         # add children coords and neighborhoods here
         # D on CA such that CD : DA = psi : 1
         # new triangles:
         #  - BDA half-dart
         #  - BDC half-kite
         d = c + psi_inv*(a-c)
-        self.children_blueprint = [
-            ((b, d, a), "halfdart", [(0, 1)]),
-            ((b, d, c), "halfkite", [(0, 0)]),
+        ea, eb, ec, ed = None, None, None, None
+        if exact:
+            ea, eb, ec = exact
+            ed = ec + (ea-ec)*ZPHI_PSI_INV
+        return [
+            ((b, d, a), "halfdart", [(0, 1)], exact and (eb, ed, ea)),
+            ((b, d, c), "halfkite", [(0, 0)], exact and (eb, ed, ec)),
         ]
 
     def getMirror(self) -> 'Robinson':
@@ -180,9 +210,12 @@ class HalfKite(Robinson):
     # A > B >> C >>> A
     # AB : BC : CA = 1 : psi : psi
 
-    def __init__(self, a: [np.float_], b: [np.float_], c: [np.float_]):
-        super().__init__(a, b, c)
+    def __init__(self, a: [np.float_], b: [np.float_], c: [np.float_], exact=None):
+        super().__init__(a, b, c, exact)
         self.cls = "halfkite"
+
+    def getChildrenBlueprint(self):
+        a, b, c, exact = self.a, self.b, self.c, self.exact
         # D on BC such that BD : DC = psi : 1
         # E on CA such that CE : EA = psi : 1
         # new triangles:
@@ -191,58 +224,141 @@ class HalfKite(Robinson):
         #  - EDC half-dart
         d = b + psi_inv*(c-b)
         e = c + psi_inv*(a-c)
-        self.children_blueprint = [
-            ((e, a, b), "halfkite", [(2, 1)]),
-            ((e, d, b), "halfkite", [(2, 0), (0, 2)]),
-            ((e, d, c), "halfdart", [(0, 1)])
+        ea, eb, ec, ed, ee = None, None, None, None, None
+        if exact:
+            ea, eb, ec = exact
+            ed = eb + (ec-eb)*ZPHI_PSI_INV
+            ee = ec + (ea-ec)*ZPHI_PSI_INV
+        return [
+            ((e, a, b), "halfkite", [(2, 1)], exact and (ee, ea, eb)),
+            ((e, d, b), "halfkite", [(2, 0), (0, 2)], exact and (ee, ed, eb)),
+            ((e, d, c), "halfdart", [(0, 1)], exact and (ee, ed, ec))
         ]
 
     def getMirror(self) -> 'Robinson':
         return self.neighbors[2]
 
+# Every half-kite (half-dart) is similar to every other one, and subdivision only takes
+# affine combinations of corners, so the subtree of relative depth k below any node is one
+# fixed pattern expressed in barycentric coordinates of the node's corners.
+class SubdivisionTemplate:
+
+    def __init__(self, type: str, depth: int):
+        root = robinsonFactory(type, *np.eye(3))
+        expand(root, depth)
+        root.linkNeighbors()
+
+        nodes = list(root.iterNodes())[1:]
+        position = {node: i for i, node in enumerate(nodes)}
+
+        # preorder, so parents always precede their children
+        self.types = [node.cls for node in nodes]
+        self.parents = [position.get(node.parent, -1) for node in nodes]
+        self.indices = [node.index for node in nodes]
+        self.suffixes = [node.id[len(root.id):] for node in nodes]
+        self.leaves = [node.leaf for node in nodes]
+        self.weights = np.array([[node.a, node.b, node.c] for node in nodes])
+        self.links = [
+            (i, edge, position[neighbor])
+            for i, node in enumerate(nodes)
+            for edge, neighbor in enumerate(node.neighbors) if neighbor
+        ]
+
+    # grow the template below node; links to the outside are left to linkNeighbors
+    def instantiate(self, node: Robinson):
+        coords = self.weights @ np.array([node.a, node.b, node.c])
+        created = []
+        for type, parent, index, suffix, leaf, (a, b, c) in zip(
+            self.types, self.parents, self.indices, self.suffixes, self.leaves, coords):
+
+            child = robinsonFactory(type, a, b, c)
+            child.parent = node if parent == -1 else created[parent]
+            child.parent.children[index-1] = child
+            child.index = index
+            child.id = node.id + suffix
+            child.leaf = leaf
+            child.skip_window = True
+            created.append(child)
+
+        for i, edge, j in self.links:
+            created[i].neighbors[edge] = created[j]
+        node.leaf = False
+
+templates = {}
+
+def getTemplate(type: str, depth: int) -> SubdivisionTemplate:
+    if (type, depth) not in templates:
+        templates[(type, depth)] = SubdivisionTemplate(type, depth)
+    return templates[(type, depth)]
+
+# subdivide levels times below node; nodes whose whole subtree is kept (skip_window) are
+# stamped out from a template instead of being subdivided and culled triangle by triangle
+def expand(node: Robinson, levels: int, window=None, use_templates: bool = False):
+    stack = [(node, levels)]
+    while stack:
+        current, remaining = stack.pop()
+        if remaining == 0: continue
+        if use_templates and current.skip_window:
+            getTemplate(current.cls, remaining).instantiate(current)
+            continue
+        current._inflate(window)
+        stack.extend((child, remaining-1) for child in current.children if child)
+
 class P2:
 
-    def __init__(self, levels: int):
-        self.triangle = HalfKite(
-            np.array([0.0, 0.0]),
-            np.array([0.0, 1.0]),
-            np.array([halfkite_height, 0.5])
-        )
-        
-        for _ in range(levels):
-            self.triangle.inflate(window=(VIEWPORT_UL, VIEWPORT_LR))
-            self.triangle.findNeighbors()
+    # exact: additionally track every vertex exactly in Z[psi] (see exact_geometry)
+    def __init__(self, levels: int, exact: bool = False):
+        a, b, c = np.array([0.0, 0.0]), np.array([0.0, 1.0]), np.array([halfkite_height, 0.5])
+        self.frame = ExactFrame(a, b, c) if exact else None
+        self.triangle = HalfKite(a, b, c, self.frame and self.frame.corners())
 
-def searchSmallestAtPoint(triangle: Robinson, x: [np.float_]) -> int:
-    if pointInTriangle(triangle.a, triangle.b, triangle.c, x): 
+        # templates only carry float coordinates
+        expand(self.triangle, levels, window=(VIEWPORT_UL, VIEWPORT_LR), use_templates=not exact)
+        self.triangle.linkNeighbors()
 
-        if triangle.leaf: return triangle.id
-        else:
-            for child in triangle.children:
-                if not child: continue
-                if (id := searchSmallestAtPoint(child, x)) != -1: return id
+def searchSmallestAtPoint(triangle: Robinson, x: [np.float_]) -> int:
+    stack = [triangle]
+    while stack:
+        current = stack.pop()
+        if not pointInTriangle(current.a, current.b, current.c, x): continue
+        if current.leaf: return current.id
+        stack.extend(child for child in reversed(current.children) if child)
 
     return -1
 
-def getPaths(triangle: Robinson):
-    if not triangle.leaf:
-        paths = []
-        for child in triangle.children:
-            if child: paths.extend(getPaths(child))
-        return paths
-    elem = ET.Element('path')
-    elem.set("d", f"M {triangle.a[0]} {triangle.a[1]} L {triangle.b[0]} {triangle.b[1]} {triangle.c[0]} {triangle.c[1]} z")
-    elem.set("class", triangle.cls)
-    elem.set("id", "id"+str(triangle.id))
-    elem.set("fill", f"rgb({255*triangle.level} {255*triangle.level} {255*triangle.level})")
-    return [elem]
+def getPaths(triangle: Robinson, window=None):
+    for leaf in triangle.iterLeaves(window):
+        elem = ET.Element('path')
+        elem.set("d", f"M {leaf.a[0]} {leaf.a[1]} L {leaf.b[0]} {leaf.b[1]} {leaf.c[0]} {leaf.c[1]} z")
+        elem.set("class", leaf.cls)
+        elem.set("id", "id"+str(leaf.id))
+        elem.set("fill", f"rgb({255*leaf.level} {255*leaf.level} {255*leaf.level})")
+        yield elem
 
 def getByID(triangle: Robinson, id):
-    if triangle.id == id: return triangle
-    for child in triangle.children:
-        if not child: continue
-        if (maybe := getByID(child, id)): return maybe
-    return None
+    # ids spell out the path from the root ("0-2-1" is the first child of the second child)
+    if not isinstance(id, str): return None
+    path, prefix = id.split("-"), triangle.id.split("-")
+    if path[:len(prefix)] != prefix: return None
+    for index in path[len(prefix):]:
+        if not index.isdigit() or not 1 <= int(index) <= len(triangle.children): return None
+        triangle = triangle.children[int(index)-1]
+        if not triangle: return None
+    return triangle
+
+# breadth-first distance (in neighbor steps) from start to every triangle it reaches
+def getWaveSchedule(start: Robinson, max_distance: int = None) -> {Robinson: int}:
+    distances = {start: 0}
+    queue = deque([start])
+    while queue:
+        current = queue.popleft()
+        distance = distances[current]
+        if max_distance is not None and distance >= max_distance: continue
+        for neighbor in current.neighbors:
+            if not neighbor or neighbor in distances: continue
+            distances[neighbor] = distance + 1
+            queue.append(neighbor)
+    return distances
 
 def propagateFromID(level, visited: [Robinson], queue: [Robinson]):
     if level < 0.03: return
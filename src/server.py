@@ -0,0 +1,214 @@
+import re
+import json
+import itertools
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+import cairosvg
+import src.dartsandkites_svg as dartsandkites_svg
+from src.constants import VIEWPORT_UL, VIEWPORT_LR
+
+# Local HTTP server for embedding tilings without the Tk app:
+#
+#   GET  /tiling/<depth>/<palette>.svg               whole tiling
+#   GET  /tiles/<depth>/<palette>/<z>/<x>/<y>.png    raster tile, the view is split into 2^z x 2^z
+#   POST /paint/<depth>/<palette>                    {"x": .., "y": .., "color": "#rrggbb"},
+#                                                    x and y relative to the whole view (0..1)
+#
+# painted tilings are kept until the server stops; once painted_capacity of them exist,
+# paints on further tilings are refused with 503
+
+PALETTES = {
+    "default": {"border_color": "#000000", "dart_color": "#ffaa00", "kite_color": "#0000cc"},
+    "mono": {"border_color": "#000000", "dart_color": "#ffffff", "kite_color": "#888888"},
+    "night": {"border_color": "#ffffff", "dart_color": "#222266", "kite_color": "#000000"},
+}
+
+MAX_DEPTH = 13
+MAX_ZOOM = 10
+TILE_WIDTH = 256
+TILE_HEIGHT = 192
+
+COLOR = re.compile(r"#([0-9a-fA-F]{3}|[0-9a-fA-F]{6})")
+
+# tiling versions are drawn from one server-wide sequence, so a tiling that is evicted and
+# regenerated can never reuse the image cache keys of its predecessor
+versions = itertools.count()
+
+class LRUCache:
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    # concurrent callers asking for the same missing key share a single compute()
+    def getOrCompute(self, key, compute):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            future = self.pending.get(key)
+            owner = future is None
+            if owner:
+                future = self.pending[key] = Future()
+
+        if not owner: return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self.lock: del self.pending[key]
+            future.set_exception(e)
+            raise
+
+        with self.lock:
+            del self.pending[key]
+            self.entries[key] = value
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        future.set_result(value)
+        return value
+
+# one editable tiling; version changes with every paint so stale images are never served
+class Tiling:
+
+    def __init__(self, depth: int, palette: str):
+        self.dnki = dartsandkites_svg.DnkInterface(depth, **PALETTES[palette])
+        self.lock = threading.Lock()
+        self.version = next(versions)
+
+class TileServer(ThreadingHTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self, address, tiling_capacity: int = 8, image_capacity: int = 1024, painted_capacity: int = 16):
+        super().__init__(address, TileRequestHandler)
+        self.tilings = LRUCache(tiling_capacity)
+        self.images = LRUCache(image_capacity)
+
+        # painted tilings hold client edits and cannot be regenerated, so they stay out of the
+        # LRU for the server's lifetime; each is a full geometry copy, hence the hard cap
+        self.painted = {}
+        self.painted_capacity = painted_capacity
+        self.painted_lock = threading.Lock()
+
+    def getTiling(self, depth: int, palette: str) -> Tiling:
+        if (tiling := self.painted.get((depth, palette))): return tiling
+        return self.tilings.getOrCompute((depth, palette), lambda: Tiling(depth, palette))
+
+    # (body, etag) of the whole tiling
+    def getSVG(self, depth: int, palette: str) -> (bytes, str):
+        tiling = self.getTiling(depth, palette)
+        def render():
+            with tiling.lock:
+                return withETag(tiling.dnki.getSVGbytes())
+        return self.images.getOrCompute((depth, palette, tiling.version, "svg"), render)
+
+    def getTile(self, depth: int, palette: str, zoom: int, x: int, y: int) -> (bytes, str):
+        tiling = self.getTiling(depth, palette)
+        size = (VIEWPORT_LR - VIEWPORT_UL) / 2**zoom
+        ul = VIEWPORT_UL + np.array([x, y]) * size
+        def render():
+            with tiling.lock:
+                svg = tiling.dnki.getRegionSVGbytes(ul, ul + size, TILE_WIDTH, TILE_HEIGHT)
+            return withETag(cairosvg.svg2png(svg))
+        return self.images.getOrCompute((depth, palette, tiling.version, "png", zoom, x, y), render)
+
+    # None when painting would pin one tiling more than painted_capacity allows
+    def paint(self, depth: int, palette: str, x: float, y: float, color: str) -> bool:
+        key = (depth, palette)
+        # may build the tiling, which takes seconds at high depths: stay outside the lock
+        tiling = self.getTiling(depth, palette)
+        with self.painted_lock:
+            if key not in self.painted and len(self.painted) >= self.painted_capacity: return None
+            tiling = self.painted.setdefault(key, tiling)
+        with tiling.lock:
+            painted = tiling.dnki.paint(x, y, color)
+            if painted: tiling.version = next(versions)
+        return painted
+
+def withETag(body: bytes) -> (bytes, str):
+    return body, '"' + hashlib.sha1(body).hexdigest() + '"'
+
+class TileRequestHandler(BaseHTTPRequestHandler):
+
+    ROUTES_GET = [
+        (re.compile(r"^/tiling/(\d+)/(\w+)\.svg$"), "tiling"),
+        (re.compile(r"^/tiles/(\d+)/(\w+)/(\d+)/(\d+)/(\d+)\.png$"), "tile"),
+    ]
+    ROUTE_PAINT = re.compile(r"^/paint/(\d+)/(\w+)$")
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        for pattern, kind in self.ROUTES_GET:
+            if not (match := pattern.match(path)): continue
+            depth, palette = int(match[1]), match[2]
+            if not self.checkTiling(depth, palette): return
+
+            if kind == "tiling":
+                body, etag = self.server.getSVG(depth, palette)
+                return self.sendBody(body, "image/svg+xml", etag)
+
+            zoom, x, y = int(match[3]), int(match[4]), int(match[5])
+            if zoom > MAX_ZOOM or x >= 2**zoom or y >= 2**zoom:
+                return self.send_error(404, "Tile out of range")
+            body, etag = self.server.getTile(depth, palette, zoom, x, y)
+            return self.sendBody(body, "image/png", etag)
+
+        self.send_error(404)
+
+    def do_POST(self):
+        match = self.ROUTE_PAINT.match(self.path.split("?")[0])
+        if not match: return self.send_error(404)
+        depth, palette = int(match[1]), match[2]
+        if not self.checkTiling(depth, palette): return
+
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            x, y, color = float(request["x"]), float(request["y"]), str(request["color"])
+        except (ValueError, KeyError, TypeError):
+            return self.send_error(400, "Expected JSON body with x, y and color")
+        if not COLOR.fullmatch(color):
+            return self.send_error(400, "Color must be #rgb or #rrggbb")
+
+        painted = self.server.paint(depth, palette, x, y, color)
+        if painted is None:
+            return self.send_error(503, "Too many painted tilings on this server")
+        self.sendBody(json.dumps({"painted": painted}).encode(), "application/json")
+
+    def checkTiling(self, depth: int, palette: str) -> bool:
+        if depth < 1 or depth > MAX_DEPTH:
+            self.send_error(404, f"Depth must be between 1 and {MAX_DEPTH}")
+            return False
+        if palette not in PALETTES:
+            self.send_error(404, f"Unknown palette '{palette}'")
+            return False
+        return True
+
+    def sendBody(self, body: bytes, content_type: str, etag: str = None):
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+if __name__=="__main__":
+
+    server = TileServer(("127.0.0.1", 8000))
+    print("Serving tilings on http://127.0.0.1:8000")
+    server.serve_forever()
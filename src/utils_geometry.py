@@ -14,6 +14,22 @@ def pointInTriangle(a: [np.float_], b: [np.float_], c: [np.float_], x: [np.float
     return all([x < 0 for x in barycentrics]) or all([x > 0 for x in barycentrics])
 
 
+# cheap conservative test: does the bounding box of triangle ABC overlap rectangle UL-LR
+def triangleBoxOverlap(A: [np.float_], B: [np.float_], C: [np.float_], UL: [np.float_], LR: [np.float_]) -> bool:
+    return (
+        max(A[0], B[0], C[0]) >= UL[0] and min(A[0], B[0], C[0]) <= LR[0] and
+        max(A[1], B[1], C[1]) >= UL[1] and min(A[1], B[1], C[1]) <= LR[1]
+    )
+
+
+# even-odd test of point x against many quadrilaterals (N, 4, 2) at once
+def pointInQuads(quads: np.ndarray, x: [np.float_]) -> np.ndarray:
+    p, q = quads, np.roll(quads, -1, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crossing = ((p[..., 1] > x[1]) != (q[..., 1] > x[1])) & (
+            x[0] < (q[..., 0] - p[..., 0]) * (x[1] - p[..., 1]) / (q[..., 1] - p[..., 1]) + p[..., 0])
+    return crossing.sum(axis=1) % 2 == 1
+
 # return relative positions of a triangle ABC and an axis-aligned rectangle UL (upper-left), LR (lower-right)
 def triangleRectanglePosition(A: [np.float_], B: [np.float_], C: [np.float_], UL: [np.float_], LR: [np.float_]) -> int:
     
@@ -0,0 +1,99 @@
+import os
+import glob
+import hashlib
+import zipfile
+import tempfile
+import numpy as np
+import src.robinson as robinson
+import src.dartsandkites as dartsandkites
+from src.constants import VIEWPORT_UL, VIEWPORT_LR
+
+# Precomputed tile geometry for the depths offered by the start page, so that opening a
+# tiling is a single file read instead of a full subdivision. A bundle is written the first
+# time one of these depths is generated; build them all ahead of time with
+#
+#   python -m src.warmstart
+#
+# other depths are always generated the usual way.
+
+BUNDLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "warmstart")
+BUNDLE_VERSION = 2
+DEFAULT_DEPTHS = range(6, 12)
+
+# modules whose source decides the generated geometry
+GEOMETRY_MODULES = ["constants.py", "utils_geometry.py", "exact_geometry.py", "robinson.py", "dartsandkites.py"]
+
+CLASSES = np.array(["kite", "dart"])
+
+# bundles are named after everything that shapes them, so editing the subdivision code or
+# the viewport makes old bundles unreachable instead of silently serving stale geometry
+def getBundleKey() -> str:
+    key = hashlib.sha1(f"{BUNDLE_VERSION} {VIEWPORT_UL.tolist()} {VIEWPORT_LR.tolist()}".encode())
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    for module in GEOMETRY_MODULES:
+        with open(os.path.join(source_dir, module), "rb") as f:
+            key.update(f.read())
+    return key.hexdigest()[:16]
+
+def getBundlePath(depth: int) -> str:
+    return os.path.join(BUNDLE_DIR, f"depth_{depth}_{getBundleKey()}.npz")
+
+def saveBundle(depth: int, dnk: dartsandkites.DartsAndKites = None):
+    dnk = dnk or dartsandkites.DartsAndKites(robinson.P2(depth))
+    corners = np.array([[tile.a, tile.b, tile.c, tile.d] for tile in dnk.tiles]).reshape(-1, 4, 2)
+    classes = np.array([tile.cls == "dart" for tile in dnk.tiles], dtype=np.uint8)
+
+    os.makedirs(BUNDLE_DIR, exist_ok=True)
+    path = getBundlePath(depth)
+    for stale in glob.glob(os.path.join(BUNDLE_DIR, f"depth_{depth}_*.npz")):
+        if stale == path: continue
+        try:
+            os.remove(stale)
+        except FileNotFoundError:
+            # another thread cleaned it up first
+            pass
+
+    # write under a unique temporary name so concurrent readers never see half a file and
+    # concurrent writers (server threads share a pid) never share one
+    with tempfile.NamedTemporaryFile(dir=BUNDLE_DIR, suffix=".tmp", delete=False) as f:
+        np.savez(f, corners=corners, classes=classes)
+    try:
+        os.replace(f.name, path)
+    except OSError:
+        os.remove(f.name)
+        raise
+
+def loadBundle(depth: int) -> dartsandkites.DartsAndKites:
+    path = getBundlePath(depth)
+    if not os.path.exists(path): return None
+
+    try:
+        with np.load(path) as bundle:
+            corners, classes = bundle["corners"], CLASSES[bundle["classes"]]
+    except (OSError, ValueError, KeyError, IndexError, zipfile.BadZipFile):
+        # unreadable bundle: drop it so loadTiling regenerates and saves a good one
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+    return dartsandkites.DartsAndKites.fromArrays(corners, classes)
+
+def loadTiling(depth: int) -> dartsandkites.DartsAndKites:
+    if (dnk := loadBundle(depth)): return dnk
+
+    dnk = dartsandkites.DartsAndKites(robinson.P2(depth))
+    if depth in DEFAULT_DEPTHS:
+        try:
+            saveBundle(depth, dnk)
+        except OSError:
+            # read-only checkout: nothing to speed up next time, but nothing lost either
+            pass
+    return dnk
+
+if __name__=="__main__":
+
+    for depth in DEFAULT_DEPTHS:
+        saveBundle(depth)
+        print(f"depth {depth}: {getBundlePath(depth)}")